@@ -0,0 +1,663 @@
+"""
+Regression tests for threat-detection.py
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+from sklearn.ensemble import IsolationForest
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "threat-detection.py"
+
+SAMPLE_URLS = [
+    "https://uniswap.org/swap",
+    "http://uniswap-airdrop.ml",
+    "https://metamask-wallet-verify.tk",
+    "https://metamaskio-login.com",
+    "https://app.metamask.io",
+    "http://pancakeswap-claim.ga",
+    "https://opensea.io/collection/boredapeyachtclub",
+    "http://openseaio-free-mint.cf",
+    "http://ethereumorg.click",
+    "http://example.download",
+    "http://example.org",
+    "",
+]
+
+
+def _load_module(name: str, without_numba: bool = False):
+    """Import threat-detection.py under a module name, optionally hiding numba"""
+    saved = sys.modules.get("numba")
+    if without_numba:
+        sys.modules["numba"] = None
+    try:
+        spec = importlib.util.spec_from_file_location(name, MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if without_numba:
+            if saved is None:
+                sys.modules.pop("numba", None)
+            else:
+                sys.modules["numba"] = saved
+    return module
+
+
+@pytest.fixture(scope="module")
+def td():
+    return _load_module("threat_detection")
+
+
+@pytest.fixture(scope="module")
+def td_fallback():
+    return _load_module("threat_detection_fallback", without_numba=True)
+
+
+@pytest.fixture(scope="module")
+def ai(td, tmp_path_factory):
+    # The engine reads and writes its model files under ./models
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("engine"))
+    try:
+        yield td.DAGShieldAI()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def engine(td, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return td.DAGShieldAI()
+
+
+@pytest.fixture
+def api(td, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return td.ThreatDetectionAPI()
+
+
+def _score_batch(module, ai, urls, noise):
+    packed, lens = module._pack_byte_rows([url.encode() for url in urls])
+    phishing = np.array([ai._domain_re.match(url) is not None for url in urls], dtype=np.bool_)
+    scores = np.empty((len(urls), 3))
+    module._score_urls(
+        packed, lens, phishing, np.zeros(len(urls)), noise, module._TLD_TABLE, module._TLD_LENS,
+        module._LEGIT_STRIPPED_TABLE, module._LEGIT_STRIPPED_LENS, module._LEGIT_DOTTED_TABLE,
+        module._LEGIT_DOTTED_LENS, module._HTTPS_PREFIX, scores
+    )
+    return scores
+
+
+def test_threat_buckets_match_threshold_chain(td):
+    for risk_score in range(101):
+        if risk_score > 80:
+            expected = td.ThreatType.SCAM_TOKEN
+        elif risk_score > 60:
+            expected = td.ThreatType.HONEYPOT
+        elif risk_score > 40:
+            expected = td.ThreatType.MALICIOUS_CONTRACT
+        else:
+            expected = td.ThreatType.SOCIAL_ENGINEERING
+        assert td._THREAT_BUCKETS[(risk_score + 19) // 20] is expected, risk_score
+
+
+def test_compact_forest_matches_sklearn(td):
+    if td.njit is None:
+        pytest.skip("numba is not installed")
+    rng = np.random.default_rng(42)
+    X = rng.standard_normal((2000, 8)).astype(np.float32)
+    model = IsolationForest(n_estimators=50, contamination=0.1, random_state=42).fit(X)
+    probe = rng.standard_normal((512, 8)).astype(np.float32)
+
+    compact = td.CompactForest.from_isolation_forest(model)
+    np.testing.assert_allclose(compact.decision_function(probe), model.decision_function(probe), atol=1e-6)
+
+
+def test_compact_forest_matches_sklearn_with_feature_subsampling(td):
+    if td.njit is None:
+        pytest.skip("numba is not installed")
+    rng = np.random.default_rng(7)
+    X = rng.standard_normal((1000, 8)).astype(np.float32)
+    model = IsolationForest(n_estimators=30, max_features=0.5, random_state=7).fit(X)
+    probe = rng.standard_normal((256, 8)).astype(np.float32)
+
+    compact = td.CompactForest.from_isolation_forest(model)
+    np.testing.assert_allclose(compact.decision_function(probe), model.decision_function(probe), atol=1e-6)
+
+
+def test_compact_forest_matches_sklearn_with_single_sample_trees(td):
+    if td.njit is None:
+        pytest.skip("numba is not installed")
+    rng = np.random.default_rng(11)
+    X = rng.standard_normal((100, 8)).astype(np.float32)
+    model = IsolationForest(n_estimators=10, max_samples=1, random_state=11).fit(X)
+
+    compact = td.CompactForest.from_isolation_forest(model)
+    np.testing.assert_allclose(compact.decision_function(X), model.decision_function(X), atol=1e-6)
+
+
+def test_hyperscan_domain_scores_match_re(td, ai):
+    if ai._domain_db is None:
+        pytest.skip("hyperscan is not installed")
+    for url in SAMPLE_URLS:
+        hyperscan_score = ai._analyze_domain(url)
+        db, ai._domain_db = ai._domain_db, None
+        try:
+            re_score = ai._analyze_domain(url)
+        finally:
+            ai._domain_db = db
+        assert hyperscan_score == pytest.approx(re_score), url
+
+
+@pytest.mark.parametrize("module_fixture", ["td", "td_fallback"])
+def test_score_urls_matches_analyze_domain(module_fixture, ai, request):
+    module = request.getfixturevalue(module_fixture)
+    noise = np.linspace(0.0, 1.0, len(SAMPLE_URLS))
+    scores = _score_batch(module, ai, SAMPLE_URLS, noise)
+
+    db, ai._domain_db = ai._domain_db, None
+    try:
+        for url, (domain, security, total), n in zip(SAMPLE_URLS, scores, noise):
+            assert domain == pytest.approx(ai._analyze_domain(url)), url
+            expected_security = min(1.0, (0.0 if url.startswith("https://") else 0.3) + n * 0.4)
+            assert security == pytest.approx(expected_security), url
+            assert total == pytest.approx((domain + security) / 3), url
+    finally:
+        ai._domain_db = db
+
+
+def test_score_urls_numba_matches_fallback(td, td_fallback, ai):
+    if td.njit is None:
+        pytest.skip("numba is not installed")
+    noise = np.random.default_rng(0).random(len(SAMPLE_URLS))
+    np.testing.assert_allclose(
+        _score_batch(td, ai, SAMPLE_URLS, noise), _score_batch(td_fallback, ai, SAMPLE_URLS, noise)
+    )
+
+
+def test_rate_limit_rejects_101st_request_within_a_second(td, api, monkeypatch):
+    monkeypatch.setattr(td.time, "monotonic_ns", lambda: 10**12)
+    request = {"type": "url", "url": "https://uniswap.org"}
+
+    async def run():
+        return [await api.detect_threat(dict(request), "api-key-1") for _ in range(101)]
+
+    responses = asyncio.run(run())
+    assert all("error" not in response for response in responses[:100])
+    assert responses[100]["error"] == "Rate limit exceeded"
+    # Other clients keep their own bucket
+    assert "error" not in asyncio.run(api.detect_threat(dict(request), "api-key-2"))
+
+
+def test_rate_limit_ignores_client_id_in_request_body(td, api, monkeypatch):
+    monkeypatch.setattr(td.time, "monotonic_ns", lambda: 10**12)
+
+    async def run():
+        return [
+            await api.detect_threat({"type": "url", "url": "https://uniswap.org", "client_id": f"spoof-{i}"})
+            for i in range(101)
+        ]
+
+    # Unidentified callers share the anonymous bucket whatever the body claims
+    responses = asyncio.run(run())
+    assert responses[100]["error"] == "Rate limit exceeded"
+
+
+def test_unfitted_transaction_scaler_is_identity(td, engine):
+    features = np.random.default_rng(3).random((4, 8)) * 1e6
+    np.testing.assert_array_equal(engine._scale_transaction_features(features), features)
+
+
+def test_anomaly_scores_use_raw_features_without_onnx(td, engine, monkeypatch):
+    # The real-time gas/value/timing checks are not defined in this tree
+    for check in ("_check_gas_anomaly", "_check_value_anomaly", "_check_timing_anomaly"):
+        monkeypatch.setattr(engine, check, lambda tx: 0.0, raising=False)
+    rng = np.random.default_rng(5)
+    train = rng.standard_normal((500, 8))
+    features = np.vstack([rng.standard_normal((3, 8)), np.full((1, 8), 25.0)])
+    model = IsolationForest(n_estimators=20, random_state=5).fit(train)
+    txs = [{} for _ in range(len(features))]
+
+    engine._ort = None
+    engine._anomaly_model = model
+    engine._model_ready.set()
+    scores = asyncio.run(engine._detect_real_anomalies_batch(features, txs))
+
+    expected = np.clip((model.decision_function(features) / 4 + 1) / 2, 0, 1)
+    np.testing.assert_allclose(scores, expected)
+
+
+def test_numba_kernels_are_compiled_before_the_first_request(td, engine, monkeypatch):
+    if td.njit is None:
+        pytest.skip("numba is not installed")
+    for check in ("_check_gas_anomaly", "_check_value_anomaly", "_check_timing_anomaly"):
+        monkeypatch.setattr(engine, check, lambda tx: 0.0, raising=False)
+    engine._ort = None
+    engine._anomaly_model = IsolationForest(n_estimators=5, random_state=0).fit(np.zeros((16, 8)))
+    engine._model_ready.set()
+    kernels = (td._fill_transaction_features, td._combine_anomaly_scores, td._score_urls)
+    compiled = [len(kernel.signatures) for kernel in kernels]
+    assert all(compiled)
+
+    features = engine._extract_transaction_features_batch([{"value": "1", "timestamp": 1_700_000_000}])
+    asyncio.run(engine._detect_real_anomalies_batch(features, [{}]))
+    asyncio.run(engine.analyze_urls_batch([{"url": "http://uniswap-airdrop.ml", "content": "free tokens"}]))
+
+    # The request paths reuse the warmed specializations instead of compiling new ones
+    assert [len(kernel.signatures) for kernel in kernels] == compiled
+
+
+def _counting_analyze_url(api, monkeypatch, delay=0.0):
+    calls = []
+    analyze_url = api.ai_engine.analyze_url
+
+    async def counted(url, content=None):
+        calls.append(url)
+        await asyncio.sleep(delay)
+        return await analyze_url(url, content)
+
+    monkeypatch.setattr(api.ai_engine, "analyze_url", counted)
+    return calls
+
+
+def test_detection_cache_serves_repeats_until_ttl(api, monkeypatch):
+    calls = _counting_analyze_url(api, monkeypatch)
+    request = {"type": "url", "url": "http://uniswap-airdrop.ml", "content": "free tokens"}
+
+    first = asyncio.run(api.detect_threat(dict(request)))
+    assert asyncio.run(api.detect_threat(dict(request))) == first
+    assert len(calls) == 1
+
+    # A different body is a different key
+    asyncio.run(api.detect_threat({**request, "content": "act now"}))
+    assert len(calls) == 2
+
+    # Age the entry past the TTL
+    key = api._request_key(request)
+    stamp, response = api.detection_cache[key]
+    api.detection_cache[key] = (stamp - api.DETECTION_CACHE_TTL - 1, response)
+    asyncio.run(api.detect_threat(dict(request)))
+    assert len(calls) == 3
+
+
+def test_detection_cache_single_flights_concurrent_duplicates(api, monkeypatch):
+    calls = _counting_analyze_url(api, monkeypatch, delay=0.05)
+    request = {"type": "url", "url": "https://opensea.io"}
+
+    async def run():
+        return await asyncio.gather(*(api.detect_threat(dict(request)) for _ in range(5)))
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(response == responses[0] for response in responses)
+    assert not api._inflight
+
+
+def test_detection_cache_returns_copies(api):
+    request = {"type": "url", "url": "https://uniswap.org"}
+    first = asyncio.run(api.detect_threat(dict(request)))
+    first["evidence"].append("tampered")
+    first["affected_addresses"].append("0xdead")
+
+    second = asyncio.run(api.detect_threat(dict(request)))
+    assert "tampered" not in second["evidence"]
+    assert second["affected_addresses"] == []
+
+
+def test_detection_cache_skips_errors(api, monkeypatch):
+    async def failing(url, content=None):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(api.ai_engine, "analyze_url", failing)
+    response = asyncio.run(api.detect_threat({"type": "url", "url": "https://uniswap.org"}))
+    assert response["error"] == "boom"
+    assert not api.detection_cache
+
+
+def _random_addresses(rng, n):
+    return ["0x" + rng.bytes(20).hex() for _ in range(n)]
+
+
+def _address_keys(engine, addresses):
+    return np.unique(np.array([engine._address_key(addr) for addr in addresses], dtype=np.uint64))
+
+
+def test_known_scam_lookups_agree(engine):
+    rng = np.random.default_rng(13)
+    scams = _random_addresses(rng, 200)
+    clean = _random_addresses(rng, 200)
+    engine.known_scam_addresses = set(scams) | {"scam.eth"}
+    engine._set_scam_index(_address_keys(engine, scams))
+
+    addresses = scams + clean + [scams[0].upper().replace("0X", "0x"), "scam.eth", "SCAM.ETH", "legit.eth", "", "0x12"]
+    expected = [True] * 200 + [False] * 200 + [True, True, True, False, False, False]
+    assert [engine._is_known_scam(addr) for addr in addresses] == expected
+    assert engine._are_known_scams(addresses).tolist() == expected
+
+
+def test_scam_bitmap_covers_every_indexed_prefix(engine):
+    rng = np.random.default_rng(17)
+    keys = _address_keys(engine, _random_addresses(rng, 500))
+    engine._set_scam_index(keys)
+
+    for key in keys.tolist():
+        bit = key >> 44
+        assert engine._scam_bloom[bit >> 3] & (1 << (bit & 7))
+    assert sum(bin(byte).count("1") for byte in engine._scam_bloom) <= len(keys)
+
+
+def test_phishing_automaton_matches_substring_scan(td, engine):
+    if td.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    patterns = ["approve(", "setapprovalforall", "permit", "transferfrom", "claim"]
+    for data in ["0xa9059cbb", "call setapprovalforall then permit", "claimclaim permit(", ""]:
+        assert engine._count_phishing_matches(patterns, data) == sum(pattern in data for pattern in patterns)
+
+
+def test_scam_index_persists_across_engines(td, engine):
+    rng = np.random.default_rng(19)
+    scams = _random_addresses(rng, 50)
+    engine._rebuild_scam_index(set(scams))
+
+    on_disk = np.fromfile(engine.SCAM_INDEX_PATH, dtype=np.uint64)
+    np.testing.assert_array_equal(on_disk, _address_keys(engine, scams))
+
+    # The engine runs from the same working directory, so a new one maps the same file
+    reloaded = td.DAGShieldAI()
+    assert isinstance(reloaded._scam_arr, np.memmap)
+    assert reloaded._are_known_scams(scams).all()
+    assert not reloaded._is_known_scam(_random_addresses(rng, 1)[0])
+
+
+def test_empty_or_failed_refresh_keeps_persisted_scam_index(engine, monkeypatch):
+    rng = np.random.default_rng(23)
+    scams = _random_addresses(rng, 10)
+    engine._rebuild_scam_index(set(scams))
+    persisted = open(engine.SCAM_INDEX_PATH, "rb").read()
+
+    engine._rebuild_scam_index(set())
+    assert open(engine.SCAM_INDEX_PATH, "rb").read() == persisted
+
+    async def unreachable(source):
+        return set()
+
+    engine._load_scam_index()
+    monkeypatch.setattr(engine, "_fetch_feed", unreachable)
+    asyncio.run(engine._refresh_known_scam_addresses())
+    assert open(engine.SCAM_INDEX_PATH, "rb").read() == persisted
+    assert engine._are_known_scams(scams).all()
+
+
+class _Body:
+    """Minimal aiohttp StreamReader stand-in that hands out fixed-size chunks"""
+
+    def __init__(self, data: bytes, chunk_size: int = 7):
+        self._data = data
+        self._chunk_size = chunk_size
+
+    async def read(self, n: int = -1) -> bytes:
+        size = min(n if n > 0 else len(self._data), self._chunk_size)
+        chunk, self._data = self._data[:size], self._data[size:]
+        return chunk
+
+
+class _Response:
+    def __init__(self, data: bytes, content_length=None, etag=None):
+        self.status = 200
+        self.content = _Body(data)
+        self.content_length = content_length
+        self.headers = {"ETag": etag} if etag else {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Session:
+    def __init__(self, response):
+        self._response = response
+
+    def get(self, url, **kwargs):
+        return self._response
+
+
+PLAINTEXT_FEED = b"0xAbC0000000000000000000000000000000000001\r\n\n  0xdef0000000000000000000000000000000000002  \n0x3330000000000000000000000000000000000003"
+JSON_LIST_FEED = b'[{"address": "0xAAA0000000000000000000000000000000000001", "comment": "x"}, {"id": 2}, {"address": "0xbbb0000000000000000000000000000000000002"}]'
+JSON_MAP_FEED = b'{"0xCCC0000000000000000000000000000000000003": {"comment": "y"}, "0xddd0000000000000000000000000000000000004": {}}'
+
+
+@pytest.mark.parametrize("source, payload", [
+    ("https://feeds.example/addresses.txt", PLAINTEXT_FEED),
+    ("https://feeds.example/darklist.json", JSON_LIST_FEED),
+    ("https://feeds.example/darklist.json", JSON_MAP_FEED),
+])
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_streamed_feed_matches_whole_payload_parse(td, engine, monkeypatch, source, payload, use_ijson):
+    if use_ijson and td.ijson is None:
+        pytest.skip("ijson is not installed")
+    if not use_ijson:
+        monkeypatch.setattr(td, "ijson", None)
+
+    stream = td.CappedStream(_Body(payload), engine.FEED_MAX_BYTES, chunk_size=7)
+    entries = asyncio.run(engine._read_scam_feed(source, stream))
+    assert entries == engine._parse_scam_feed(source, payload)
+    assert len(entries) in (2, 3) and all(entry == entry.lower() for entry in entries)
+
+
+def test_feed_stream_is_capped(td, engine):
+    stream = td.CappedStream(_Body(PLAINTEXT_FEED), max_bytes=50, chunk_size=16)
+    with pytest.raises(ValueError, match="exceeds 50 bytes"):
+        asyncio.run(engine._read_scam_feed("https://feeds.example/addresses.txt", stream))
+
+
+@pytest.mark.parametrize("content_length", [None, 10**9])
+def test_oversized_feed_keeps_last_good_copy(engine, monkeypatch, content_length):
+    source = "https://feeds.example/addresses.txt"
+    monkeypatch.setattr(engine, "_get_session", lambda: _Session(_Response(PLAINTEXT_FEED, etag='"v1"')))
+    good = asyncio.run(engine._fetch_feed(source))
+    assert len(good) == 3 and engine._feed_etags[source] == '"v1"'
+
+    monkeypatch.setattr(engine, "FEED_MAX_BYTES", 50)
+    oversized = _Response(PLAINTEXT_FEED * 10, content_length=content_length, etag='"v2"')
+    monkeypatch.setattr(engine, "_get_session", lambda: _Session(oversized))
+    assert asyncio.run(engine._fetch_feed(source)) == good
+    assert engine._feed_entries[source] == good and engine._feed_etags[source] == '"v1"'
+
+
+CONTRACT_SOURCES = [
+    None,
+    "contract Clean { function hello() public {} }",
+    "contract A { function kill() { selfdestruct(owner); } }",
+    "contract B { function f() { target.delegatecall(data); selfdestruct(x); } }\n// blacklist function present",
+    "contract C { // transfer fee > 50%\n uint x; }",
+]
+
+
+def _result_fields(result):
+    return (result.contract_address, result.threat_type, result.confidence, result.risk_score, result.evidence)
+
+
+def test_contract_batch_matches_single_analysis(engine):
+    rng = np.random.default_rng(29)
+    contracts = [
+        {"address": address, "source_code": CONTRACT_SOURCES[i % len(CONTRACT_SOURCES)]}
+        for i, address in enumerate(_random_addresses(rng, 40))
+    ]
+
+    async def run():
+        batch = await engine.analyze_contracts_batch(contracts)
+        single = [await engine.analyze_contract(c["address"], c["source_code"]) for c in contracts]
+        return batch, single
+
+    batch, single = asyncio.run(run())
+    assert [_result_fields(r) for r in batch] == [_result_fields(r) for r in single]
+    assert len({r.risk_score for r in batch}) > 3
+
+
+def test_contract_batch_weights_match_single_evaluation(engine):
+    infos, analyses, patterns = [], [], []
+    for mask in range(16):
+        analyses.append({
+            "suspicious_functions": ["selfdestruct("] if mask & 1 else [],
+            "risk_indicators": ["blacklist_function_present"] if mask & 2 else [],
+        })
+        patterns.append({"suspicious_patterns": 4 if mask & 4 else 1})
+        infos.append({"is_verified": not mask & 8})
+    addresses = [f"0x{mask:040x}" for mask in range(16)]
+
+    batch = engine._evaluate_contract_threat_batch(addresses, infos, analyses, np.zeros(16, dtype=bool), patterns)
+    single = [
+        engine._evaluate_contract_threat(addr, info, analysis, False, pattern)
+        for addr, info, analysis, pattern in zip(addresses, infos, analyses, patterns)
+    ]
+    assert [_result_fields(r) for r in batch] == [_result_fields(r) for r in single]
+
+
+def test_known_scam_contracts_short_circuit(td, engine, monkeypatch):
+    rng = np.random.default_rng(31)
+    scam, clean = _random_addresses(rng, 2)
+    engine._set_scam_index(_address_keys(engine, [scam]))
+
+    fetched = []
+
+    async def fetch(address):
+        fetched.append(address)
+        return {"is_verified": True}
+
+    monkeypatch.setattr(engine, "_fetch_contract_info", fetch)
+    monkeypatch.setattr(engine, "_analyze_contract_transactions", fetch)
+    monkeypatch.setattr(engine, "_analyze_contract_code", lambda source: pytest.fail("scam code was analyzed"))
+
+    async def run():
+        single = await engine.analyze_contract(scam, "selfdestruct(owner);")
+        batch = await engine.analyze_contracts_batch([{"address": scam, "source_code": "selfdestruct(owner);"}])
+        return single, batch
+
+    single, batch = asyncio.run(run())
+    assert fetched == []
+    for result in (single, batch[0]):
+        assert _result_fields(result) == (scam, td.ThreatType.SCAM_TOKEN, 1.0, 100, [("known_scam",)])
+
+    # Only the clean contract is looked up in a mixed batch
+    asyncio.run(engine.analyze_contracts_batch([{"address": scam}, {"address": clean}]))
+    assert fetched == [clean, clean]
+
+
+@pytest.fixture(params=["UTC", "America/New_York", "Asia/Kolkata", "Australia/Lord_Howe"])
+def local_timezone(request):
+    saved = os.environ.get("TZ")
+    os.environ["TZ"] = request.param
+    time.tzset()
+    yield request.param
+    if saved is None:
+        os.environ.pop("TZ", None)
+    else:
+        os.environ["TZ"] = saved
+    time.tzset()
+
+
+@pytest.mark.parametrize("module_fixture", ["td", "td_fallback"])
+def test_hour_features_use_local_time(module_fixture, local_timezone, request):
+    module = request.getfixturevalue(module_fixture)
+    # Hourly steps across 2024, which spans both DST transitions in every zone above
+    timestamps = np.arange(1_704_067_200, 1_735_689_600, 3600 + 37, dtype=np.int64)
+    n = len(timestamps)
+    zeros = np.zeros(n)
+    out = np.empty((n, 8), dtype=np.float32)
+    module._fill_transaction_features(
+        zeros, zeros, zeros, np.zeros(n, dtype=np.int64), module._to_local_seconds(timestamps),
+        np.zeros(n, dtype=np.float32), np.zeros(n, dtype=np.float32), out
+    )
+
+    hours = np.array([datetime.fromtimestamp(int(ts)).hour for ts in timestamps])
+    np.testing.assert_array_equal(out[:, 6], hours)
+    np.testing.assert_array_equal(out[:, 7], (hours <= 6).astype(np.float32))
+
+
+def test_transaction_features_use_local_hour(engine, local_timezone):
+    ts = 1_720_000_000
+    features = engine._extract_transaction_features({"timestamp": ts, "value": "5", "gas": "21000"})
+    hour = datetime.fromtimestamp(ts).hour
+    assert features.ravel()[6] == hour
+    assert features.ravel()[7] == float(hour <= 6)
+
+
+def test_timestamps_serialize_as_epoch_milliseconds(td):
+    cached = td._cached_now()
+    assert td._epoch_ms(cached) == int(cached.timestamp()) * 1000
+    precise = datetime(2024, 3, 10, 12, 30, 15, 123456)
+    assert td._epoch_ms(precise) == int(precise.timestamp() * 1000)
+
+    result = td.ThreatDetectionResult(
+        threat_type=td.ThreatType.PHISHING, confidence=0.9, risk_score=90, evidence=[], timestamp=precise
+    )
+    serialized = td.ThreatDetectionAPI._serialize_result(result)
+    assert serialized["timestamp"] == int(precise.timestamp() * 1000)
+    assert isinstance(serialized["timestamp"], int)
+
+    before = int(time.time() * 1000)
+    assert before <= td.ThreatDetectionAPI._error_response("x")["timestamp"] <= int(time.time() * 1000)
+
+
+def test_detect_threat_json_encodes_the_response(api):
+    request = {"type": "contract", "address": "0x" + "ab" * 20, "source_code": "selfdestruct(owner);"}
+
+    async def run():
+        return await api.detect_threat(dict(request)), await api.detect_threat_json(dict(request))
+
+    response, encoded = asyncio.run(run())
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == response
+
+
+def test_deferred_evidence_renders_like_the_old_strings(td):
+    indicators = ["blacklist_function_present", "ownership_not_renounced"]
+    evidence = [
+        ("known_scam",),
+        ("suspicious_functions", 3),
+        ("risk_indicators", indicators),
+        ("suspicious_tx_patterns",),
+        ("unverified",),
+        ("domain_score", 0.456),
+        ("content_score", 0),
+        ("security_score", 1.0),
+        "Analysis error: boom",
+    ]
+    assert td._format_evidence(evidence) == [
+        "Known scam address",
+        "Suspicious functions: 3",
+        f"Risk indicators: {indicators}",
+        "Suspicious transaction patterns",
+        "Unverified contract",
+        "Domain analysis: 0.46",
+        "Content analysis: 0.00",
+        "Security analysis: 1.00",
+        "Analysis error: boom",
+    ]
+
+
+def test_contract_evidence_is_formatted_on_serialization(td, engine):
+    code_analysis = engine._analyze_contract_code("selfdestruct(a); selfdestruct(b);\n// blacklist function present")
+    result = engine._evaluate_contract_threat(
+        "0x" + "cd" * 20, {"is_verified": False}, code_analysis, False, {"suspicious_patterns": 3}
+    )
+    assert all(isinstance(item, tuple) for item in result.evidence)
+    assert td.ThreatDetectionAPI._serialize_result(result)["evidence"] == [
+        "Suspicious functions: 2",
+        "Risk indicators: ['blacklist_function_present']",
+        "Suspicious transaction patterns",
+        "Unverified contract",
+    ]